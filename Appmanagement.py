@@ -1,18 +1,40 @@
 """Application management - Business logic and validation"""
 
-from typing import List, Dict, Set, Optional
-from sqlalchemy.orm import Session
+import copy
+import os
+import time
+from collections import OrderedDict
+from typing import List, Dict, Set, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import (
     create_dataset as db_create_dataset,
+    create_datasets as db_create_datasets,
+    get_existing_fqns,
     get_dataset_by_fqn,
     get_dataset_by_id,
+    get_dataset_ids_by_fqns,
     create_lineage as db_create_lineage,
-    get_upstream_datasets,
-    get_downstream_datasets,
+    prefetch_lineage_fqns,
+    is_reachable,
+    lineage_write_lock,
     search_datasets as db_search_datasets,
     Dataset
 )
 from log import log_info, log_error, log_exception
+from utils import parse_fqn
+from Dbconfig import SOURCE_SYSTEMS
+
+# Search result cache (FIFO), keyed on the normalized query.
+# Cleared on every write, but the cache is per process: with several workers a
+# write only clears its own worker's cache, so entries also expire after
+# SEARCH_CACHE_TTL seconds (0 disables the cache)
+SEARCH_CACHE_MAX = 1024
+SEARCH_CACHE_MAX_RESULTS = 500  # larger result sets are not cached
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "5"))
+SEARCH_CACHE: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+# Bumped on every write; a search only caches its results if no write
+# happened while it was querying
+SEARCH_EPOCH = 0
 
 
 class CycleDetectionError(Exception):
@@ -30,139 +52,197 @@ class DatasetAlreadyExistsError(Exception):
     pass
 
 
+def invalidate_search_cache():
+    """Drop cached search results after a write"""
+    global SEARCH_EPOCH
+    SEARCH_EPOCH += 1
+    SEARCH_CACHE.clear()
+
+
 @log_exception
-def add_dataset(db: Session, fqn: str, source_type: str, columns: List[Dict]) -> Dataset:
+async def add_dataset(
+    db: AsyncSession, fqn: str, source_type: str, columns: List[Dict],
+    fqn_parts: Optional[Tuple[str, str, str, str]] = None
+) -> Dataset:
     """
     Add a new dataset to the system
     Validates that dataset doesn't already exist
+    fqn_parts can carry the FQN already parsed by validate_dataset_data
     """
     # Check if dataset already exists
-    existing = get_dataset_by_fqn(db, fqn)
+    existing = await get_dataset_by_fqn(db, fqn)
     if existing:
         log_error("DatasetAlreadyExists", f"Dataset with FQN {fqn} already exists")
         raise DatasetAlreadyExistsError(f"Dataset with FQN {fqn} already exists")
 
     # Create dataset
-    dataset = db_create_dataset(db, fqn, source_type, columns)
+    dataset = await db_create_dataset(db, fqn, source_type, columns, fqn_parts)
+    invalidate_search_cache()
     log_info(f"Dataset added successfully: {fqn}")
     return dataset
 
 
 @log_exception
-def detect_cycle_dfs(db: Session, start_id: int, target_id: int) -> bool:
+async def add_datasets(db: AsyncSession, items: List[Tuple[str, str, List[Dict]]]) -> List[Dataset]:
+    """
+    Add many datasets in one batch
+    items: (fqn, source_type, columns) tuples
+    Validates every item, then checks existence with a single query
+    """
+    fqns = [fqn for fqn, _, _ in items]
+    if len(fqns) != len(set(fqns)):
+        raise ValueError("Duplicate FQNs in batch are not allowed")
+
+    validated = [
+        (fqn, validate_dataset_data(fqn, source_type, columns), source_type, columns)
+        for fqn, source_type, columns in items
+    ]
+
+    # Check if any dataset already exists
+    existing = await get_existing_fqns(db, fqns)
+    if existing:
+        error_msg = f"Datasets with FQNs {sorted(existing)} already exist"
+        log_error("DatasetAlreadyExists", error_msg)
+        raise DatasetAlreadyExistsError(error_msg)
+
+    # Create datasets
+    datasets = await db_create_datasets(db, validated)
+    invalidate_search_cache()
+    log_info(f"Datasets added successfully: {len(datasets)}")
+    return datasets
+
+
+@log_exception
+async def detect_cycle_dfs(db: AsyncSession, start_id: int, target_id: int) -> bool:
     """
     Detect if adding edge (start_id -> target_id) would create a cycle
-    Uses DFS to check if there's already a path from target_id to start_id
+    Checks if there's already a path from target_id to start_id
     If such path exists, adding start_id -> target_id would create a cycle
+    Paths are kept in the lineage closure table, so this is a single key lookup
     """
-    visited = set()
-    
-    def dfs(current_id: int) -> bool:
-        if current_id == start_id:
-            return True  # Cycle detected
-        
-        if current_id in visited:
-            return False
-        
-        visited.add(current_id)
-        
-        # Get all downstream datasets from current
-        downstream = get_downstream_datasets(db, current_id)
-        for ds in downstream:
-            if dfs(ds.id):
-                return True
-        
-        return False
-    
-    # Start DFS from target_id to see if we can reach start_id
-    return dfs(target_id)
+    if start_id == target_id:
+        return True
+
+    return await is_reachable(db, target_id, start_id)
 
 
 @log_exception
-def add_lineage(db: Session, upstream_fqn: str, downstream_fqn: str):
+async def add_lineage(db: AsyncSession, upstream_fqn: str, downstream_fqn: str):
     """
     Add lineage relationship between two datasets
     Validates:
     1. Both datasets exist
     2. No cycle would be created
     """
-    # Check if datasets exist
-    upstream_dataset = get_dataset_by_fqn(db, upstream_fqn)
-    if not upstream_dataset:
-        log_error("DatasetNotFound", f"Upstream dataset {upstream_fqn} not found")
-        raise DatasetNotFoundError(f"Upstream dataset {upstream_fqn} not found")
-    
-    downstream_dataset = get_dataset_by_fqn(db, downstream_fqn)
-    if not downstream_dataset:
-        log_error("DatasetNotFound", f"Downstream dataset {downstream_fqn} not found")
-        raise DatasetNotFoundError(f"Downstream dataset {downstream_fqn} not found")
-    
-    # Check for self-reference
-    if upstream_dataset.id == downstream_dataset.id:
-        log_error("CycleDetected", "Cannot create lineage to self")
-        raise CycleDetectionError("Cannot create lineage to self")
+    # The whole check-then-write step runs under the lineage write lock, so
+    # concurrent requests cannot each miss the other's new paths
+    async with lineage_write_lock(db):
+        # Check if datasets exist (both FQNs resolved in a single lookup)
+        dataset_ids = await get_dataset_ids_by_fqns(db, [upstream_fqn, downstream_fqn])
+
+        upstream_id = dataset_ids.get(upstream_fqn)
+        if upstream_id is None:
+            log_error("DatasetNotFound", f"Upstream dataset {upstream_fqn} not found")
+            raise DatasetNotFoundError(f"Upstream dataset {upstream_fqn} not found")
+
+        downstream_id = dataset_ids.get(downstream_fqn)
+        if downstream_id is None:
+            log_error("DatasetNotFound", f"Downstream dataset {downstream_fqn} not found")
+            raise DatasetNotFoundError(f"Downstream dataset {downstream_fqn} not found")
+
+        # Check for self-reference
+        if upstream_id == downstream_id:
+            log_error("CycleDetected", "Cannot create lineage to self")
+            raise CycleDetectionError("Cannot create lineage to self")
     
-    # Check if this would create a cycle
-    # If there's already a path from downstream to upstream, adding upstream->downstream creates cycle
-    if detect_cycle_dfs(db, upstream_dataset.id, downstream_dataset.id):
-        error_msg = f"Creating lineage {upstream_fqn} -> {downstream_fqn} would create a cycle"
-        log_error("CycleDetected", error_msg)
-        raise CycleDetectionError(error_msg)
+        # Check if this would create a cycle
+        # If there's already a path from downstream to upstream, adding upstream->downstream creates cycle
+        if await detect_cycle_dfs(db, upstream_id, downstream_id):
+            error_msg = f"Creating lineage {upstream_fqn} -> {downstream_fqn} would create a cycle"
+            log_error("CycleDetected", error_msg)
+            raise CycleDetectionError(error_msg)
     
-    # Create lineage
-    lineage = db_create_lineage(db, upstream_dataset.id, downstream_dataset.id)
-    log_info(f"Lineage added: {upstream_fqn} -> {downstream_fqn}")
+        # Create lineage
+        lineage = await db_create_lineage(db, upstream_id, downstream_id)
+        invalidate_search_cache()
+        log_info(f"Lineage added: {upstream_fqn} -> {downstream_fqn}")
     return lineage
 
 
+def dataset_to_dict(dataset: Dataset) -> Dict:
+    """Convert a dataset (with loaded columns) to plain data"""
+    return {
+        "id": dataset.id,
+        "fqn": dataset.fqn,
+        "connection_name": dataset.connection_name,
+        "database_name": dataset.database_name,
+        "schema_name": dataset.schema_name,
+        "table_name": dataset.table_name,
+        "source_type": dataset.source_type,
+        "columns": [{"name": col.name, "type": col.type} for col in dataset.columns]
+    }
+
+
 @log_exception
-def search_datasets_with_lineage(db: Session, query: str) -> List[Dict]:
+async def search_datasets_with_lineage(db: AsyncSession, query: str) -> List[Dict]:
     """
     Search datasets and include their lineage information
     Returns sorted results with priority
     """
-    results = db_search_datasets(db, query)
-    
+    query = query.strip()
+    key = query.lower()
+    entry = SEARCH_CACHE.get(key)
+    if entry is not None:
+        expires_at, cached = entry
+        if time.monotonic() < expires_at:
+            log_info(f"Search cache hit: '{query}' - {len(cached)} results found")
+            return copy.deepcopy(cached)
+        SEARCH_CACHE.pop(key, None)
+
+    epoch = SEARCH_EPOCH
+    results = await db_search_datasets(db, query)
+
+    # Load lineage for every match in one query instead of two per result
+    upstream_fqns, downstream_fqns = await prefetch_lineage_fqns(db, [r[0].id for r in results])
+
     search_results = []
     for dataset, match_type, priority in results:
-        # Get upstream datasets
-        upstream = get_upstream_datasets(db, dataset.id)
-        upstream_fqns = [ds.fqn for ds in upstream]
-        
-        # Get downstream datasets
-        downstream = get_downstream_datasets(db, dataset.id)
-        downstream_fqns = [ds.fqn for ds in downstream]
-        
         # Build result
         result = {
-            "dataset": dataset,
+            "dataset": dataset_to_dict(dataset),
             "match_type": match_type,
             "priority": priority,
-            "upstream_datasets": upstream_fqns,
-            "downstream_datasets": downstream_fqns
+            "upstream_datasets": upstream_fqns.get(dataset.id, []),
+            "downstream_datasets": downstream_fqns.get(dataset.id, [])
         }
         search_results.append(result)
     
+    # Results read before a concurrent write must not outlive it in the cache
+    if SEARCH_CACHE_TTL > 0 and len(search_results) <= SEARCH_CACHE_MAX_RESULTS and epoch == SEARCH_EPOCH:
+        SEARCH_CACHE[key] = (time.monotonic() + SEARCH_CACHE_TTL, copy.deepcopy(search_results))
+        if len(SEARCH_CACHE) > SEARCH_CACHE_MAX:
+            SEARCH_CACHE.popitem(last=False)
+
     log_info(f"Search completed: '{query}' - {len(search_results)} results found")
     return search_results
 
 
 @log_exception
-def get_dataset_lineage(db: Session, fqn: str) -> Dict:
+async def get_dataset_lineage(db: AsyncSession, fqn: str) -> Dict:
     """
     Get complete lineage information for a dataset
     """
-    dataset = get_dataset_by_fqn(db, fqn)
+    dataset = await get_dataset_by_fqn(db, fqn)
     if not dataset:
         raise DatasetNotFoundError(f"Dataset {fqn} not found")
     
-    upstream = get_upstream_datasets(db, dataset.id)
-    downstream = get_downstream_datasets(db, dataset.id)
-    
+    # Both directions in one round trip
+    upstream_fqns, downstream_fqns = await prefetch_lineage_fqns(db, [dataset.id])
+
     return {
         "dataset": dataset,
-        "upstream": [ds.fqn for ds in upstream],
-        "downstream": [ds.fqn for ds in downstream]
+        "upstream": upstream_fqns.get(dataset.id, []),
+        "downstream": downstream_fqns.get(dataset.id, [])
     }
 
 
@@ -170,11 +250,16 @@ def get_dataset_lineage(db: Session, fqn: str) -> Dict:
 def validate_dataset_data(fqn: str, source_type: str, columns: List[Dict]):
     """
     Validate dataset data before creation
+    Returns the parsed FQN parts (connection, database, schema, table)
     """
     # FQN validation
-    parts = fqn.split('.')
-    if len(parts) != 4:
+    parts = parse_fqn(fqn)
+    if parts is None:
         raise ValueError("FQN must have exactly 4 parts: connection.database.schema.table")
+
+    # Source system validation
+    if source_type not in SOURCE_SYSTEMS:
+        raise ValueError(f"source_type must be one of {SOURCE_SYSTEMS}")
     
     # Check if columns list is not empty
     if not columns:
@@ -185,4 +270,4 @@ def validate_dataset_data(fqn: str, source_type: str, columns: List[Dict]):
     if len(column_names) != len(set(column_names)):
         raise ValueError("Duplicate column names are not allowed")
     
-    return True
\ No newline at end of file
+    return parts
\ No newline at end of file
@@ -4,6 +4,7 @@
 DATASETS_TABLE = "datasets"
 COLUMNS_TABLE = "columns"
 LINEAGE_TABLE = "lineage"
+LINEAGE_CLOSURE_TABLE = "lineage_closure"
 
 # Source system types
 SOURCE_SYSTEMS = ["MySQL", "MSSQL", "PostgreSQL"]
@@ -24,4 +25,7 @@ SEARCH_PRIORITY = {
     "column_name": 2,
     "schema_name": 3,
     "database_name": 4
-}
\ No newline at end of file
+}
+
+# Minimum query length served by the FULLTEXT ngram indexes (MySQL ngram_token_size)
+NGRAM_TOKEN_SIZE = 2
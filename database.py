@@ -1,13 +1,25 @@
 """Database functions - All CRUD operations"""
 
+import asyncio
 import os
-from typing import List, Optional, Dict
-from sqlalchemy import create_engine, Column as SQLColumn, Integer, String, ForeignKey, Table, Text
+import threading
+from collections import defaultdict, OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterator, List, Optional, Dict, Set, Tuple
+from sqlalchemy import (
+    Column as SQLColumn, Integer, Float, String, ForeignKey, Table, Text, Index,
+    UniqueConstraint, select, insert, delete, literal, func, union_all, type_coerce, inspect, text
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import relationship, selectinload, aliased
 from dotenv import load_dotenv
 from log import log_info, log_error, log_exception
-from Dbconfig import DATASETS_TABLE, COLUMNS_TABLE, LINEAGE_TABLE
+from utils import parse_fqn
+from Dbconfig import (
+    DATASETS_TABLE, COLUMNS_TABLE, LINEAGE_TABLE, LINEAGE_CLOSURE_TABLE, SEARCH_PRIORITY, NGRAM_TOKEN_SIZE
+)
 
 load_dotenv()
 
@@ -18,13 +30,45 @@ DB_HOST = os.getenv("DB_HOST", "mysql")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME", "metadata_db")
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Connection pool (per worker process: with uvicorn --workers N the database
+# sees up to N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "5"))
+
+DATABASE_URL = f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
 
 # SQLAlchemy setup
-engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_use_lifo=True  # reuse warm connections, let idle ones expire
+)
+# Objects stay usable after commit; lazy loads are not available on AsyncSession
+SessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
+# FQN -> dataset id cache (FIFO eviction) in front of get_dataset_by_fqn
+FQN_CACHE_MAX = 4096
+_fqn_cache: "OrderedDict[str, int]" = OrderedDict()
+_fqn_cache_lock = threading.Lock()
+
+# Rows per multi-row INSERT (and values per IN list) in bulk operations,
+# keeping each statement well below max_allowed_packet
+INSERT_BATCH_SIZE = 1000
+
+
+def _batches(rows: List) -> Iterator[List]:
+    """Split rows into consecutive slices of at most INSERT_BATCH_SIZE items"""
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        yield rows[start:start + INSERT_BATCH_SIZE]
+
 
 # SQLAlchemy Models
 class Dataset(Base):
@@ -39,6 +83,11 @@ class Dataset(Base):
     table_name = SQLColumn(String(100), nullable=False, index=True)
     source_type = SQLColumn(String(50), nullable=False)
 
+    # Lower-cased copies used by search, so matching needs no per-row LOWER()
+    database_name_lc = SQLColumn(String(100), nullable=False, index=True)
+    schema_name_lc = SQLColumn(String(100), nullable=False, index=True)
+    table_name_lc = SQLColumn(String(100), nullable=False, index=True)
+
     # Relationships
     columns = relationship("DatasetColumn", back_populates="dataset", cascade="all, delete-orphan")
     upstream_lineages = relationship(
@@ -48,6 +97,16 @@ class Dataset(Base):
         "Lineage", foreign_keys="Lineage.upstream_id", back_populates="upstream"
     )
 
+    # MySQL FULLTEXT (ngram) indexes used to narrow substring search
+    __table_args__ = (
+        Index("ft_ngram_datasets_table_name", "table_name_lc",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+        Index("ft_ngram_datasets_schema_name", "schema_name_lc",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+        Index("ft_ngram_datasets_database_name", "database_name_lc",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
+
 
 class DatasetColumn(Base):
     """Column model"""
@@ -58,9 +117,17 @@ class DatasetColumn(Base):
     name = SQLColumn(String(100), nullable=False, index=True)
     type = SQLColumn(String(50), nullable=False)
 
+    # Lower-cased copy of name used by search
+    name_lc = SQLColumn(String(100), nullable=False, index=True)
+
     # Relationships
     dataset = relationship("Dataset", back_populates="columns")
 
+    __table_args__ = (
+        Index("ft_ngram_columns_name", "name_lc",
+              mysql_prefix="FULLTEXT", mysql_with_parser="ngram").ddl_if(dialect="mysql"),
+    )
+
 
 class Lineage(Base):
     """Lineage model"""
@@ -68,38 +135,158 @@ class Lineage(Base):
 
     id = SQLColumn(Integer, primary_key=True, index=True)
     upstream_id = SQLColumn(Integer, ForeignKey(f"{DATASETS_TABLE}.id"), nullable=False)
-    downstream_id = SQLColumn(Integer, ForeignKey(f"{DATASETS_TABLE}.id"), nullable=False)
+    downstream_id = SQLColumn(Integer, ForeignKey(f"{DATASETS_TABLE}.id"), nullable=False, index=True)
 
     # Relationships
     upstream = relationship("Dataset", foreign_keys=[upstream_id], back_populates="downstream_lineages")
     downstream = relationship("Dataset", foreign_keys=[downstream_id], back_populates="upstream_lineages")
 
+    # One row per edge; also serves lookups by upstream_id (leftmost column)
+    __table_args__ = (
+        UniqueConstraint("upstream_id", "downstream_id", name="uq_lineage_edge"),
+    )
+
+
+class LineageClosure(Base):
+    """Transitive closure of lineage: one row per (ancestor, descendant) path"""
+    __tablename__ = LINEAGE_CLOSURE_TABLE
+
+    ancestor_id = SQLColumn(Integer, ForeignKey(f"{DATASETS_TABLE}.id"), primary_key=True)
+    descendant_id = SQLColumn(Integer, ForeignKey(f"{DATASETS_TABLE}.id"), primary_key=True, index=True)
+
+
+# Lower-cased search columns added to existing tables: table -> {column: source column}
+LOWERCASE_COLUMNS = {
+    DATASETS_TABLE: {
+        "database_name_lc": "database_name",
+        "schema_name_lc": "schema_name",
+        "table_name_lc": "table_name",
+    },
+    COLUMNS_TABLE: {"name_lc": "name"},
+}
+
+# FULLTEXT indexes built with InnoDB's stopword list, which drops every ngram
+# containing a single-letter stopword such as "a" or "i"; rebuilt on startup
+REPLACED_INDEXES = {
+    DATASETS_TABLE: ["ft_datasets_table_name", "ft_datasets_schema_name", "ft_datasets_database_name"],
+    COLUMNS_TABLE: ["ft_columns_name"],
+}
+
+# Named MySQL lock serializing schema changes when several workers start at once
+SCHEMA_LOCK_NAME = "metadata_service_schema"
+SCHEMA_LOCK_TIMEOUT = 60
+
+
+def _add_lowercase_columns(conn):
+    """Add and fill the *_lc columns on tables created before they existed"""
+    inspector = inspect(conn)
+    for table_name, lowercase_columns in LOWERCASE_COLUMNS.items():
+        table = Base.metadata.tables[table_name]
+        existing = {column["name"] for column in inspector.get_columns(table_name)}
+        for name, source in lowercase_columns.items():
+            if name in existing:
+                continue
+            column_type = table.c[name].type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type}"))
+            conn.execute(table.update().values({name: func.lower(table.c[source])}))
+            if conn.dialect.name == "mysql":
+                conn.execute(text(f"ALTER TABLE {table_name} MODIFY {name} {column_type} NOT NULL"))
+            log_info(f"Added column {table_name}.{name}")
+
+
+def _add_unique_lineage_edges(conn):
+    """Remove duplicate edges and add uq_lineage_edge to a lineage table created before it existed"""
+    inspector = inspect(conn)
+    existing = {constraint["name"] for constraint in inspector.get_unique_constraints(LINEAGE_TABLE)}
+    existing |= {index["name"] for index in inspector.get_indexes(LINEAGE_TABLE)}
+    if "uq_lineage_edge" in existing:
+        return
+
+    # Keep the oldest row of each edge (the derived table lets MySQL read the table it deletes from)
+    keep = (
+        select(func.min(Lineage.id).label("id"))
+        .group_by(Lineage.upstream_id, Lineage.downstream_id)
+        .subquery()
+    )
+    removed = conn.execute(delete(Lineage).where(Lineage.id.not_in(select(keep.c.id)))).rowcount
+    conn.execute(text(
+        f"CREATE UNIQUE INDEX uq_lineage_edge ON {LINEAGE_TABLE} (upstream_id, downstream_id)"
+    ))
+    log_info(f"Added unique constraint {LINEAGE_TABLE}.uq_lineage_edge ({removed} duplicate edges removed)")
+
+
+def _sync_indexes(conn):
+    """Drop replaced indexes and create any index missing from an existing table"""
+    inspector = inspect(conn)
+    for table_name, table in Base.metadata.tables.items():
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        for name in REPLACED_INDEXES.get(table_name, []):
+            if name in existing:
+                conn.execute(text(f"DROP INDEX {name} ON {table_name}"))
+                log_info(f"Dropped index {table_name}.{name}")
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+
+def _create_schema(conn):
+    """Create missing tables and columns (create_all does not alter existing tables)"""
+    locked = conn.dialect.name == "mysql"
+    if locked:
+        acquired = conn.scalar(
+            text("SELECT GET_LOCK(:name, :timeout)"),
+            {"name": SCHEMA_LOCK_NAME, "timeout": SCHEMA_LOCK_TIMEOUT}
+        )
+        if acquired != 1:
+            raise RuntimeError(f"Could not acquire schema lock {SCHEMA_LOCK_NAME}")
+    try:
+        if conn.dialect.name == "mysql":
+            # FULLTEXT indexes keep the stopword setting they were created with
+            conn.execute(text("SET SESSION innodb_ft_enable_stopword = OFF"))
+        Base.metadata.create_all(conn)
+        _add_lowercase_columns(conn)
+        _add_unique_lineage_edges(conn)
+        _sync_indexes(conn)
+    finally:
+        if locked:
+            conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": SCHEMA_LOCK_NAME})
+
 
-def init_db():
+async def init_db():
     """Initialize database - create all tables"""
     try:
-        Base.metadata.create_all(bind=engine)
+        async with async_engine.begin() as conn:
+            await conn.run_sync(_create_schema)
+        async with SessionLocal() as db:
+            await backfill_lineage_closure(db)
         log_info("Database initialized successfully")
     except Exception as e:
         log_error("DatabaseInitError", f"Failed to initialize database: {str(e)}")
         raise
 
 
-def get_db():
+async def close_db():
+    """Close all pooled database connections"""
+    await async_engine.dispose()
+
+
+async def get_db() -> AsyncIterator[AsyncSession]:
     """Get database session"""
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 # CRUD Operations for Datasets
 @log_exception
-def create_dataset(db: Session, fqn: str, source_type: str, columns: List[Dict]) -> Dataset:
-    """Create a new dataset with columns"""
+async def create_dataset(
+    db: AsyncSession, fqn: str, source_type: str, columns: List[Dict],
+    fqn_parts: Optional[Tuple[str, str, str, str]] = None
+) -> Dataset:
+    """Create a new dataset with columns (fqn_parts skips re-parsing the FQN)"""
     # Parse FQN
-    parts = fqn.split('.')
+    parts = fqn_parts or parse_fqn(fqn)
+    if parts is None:
+        raise ValueError("FQN must have exactly 4 parts: connection.database.schema.table")
     connection_name, database_name, schema_name, table_name = parts
 
     # Create dataset
@@ -109,115 +296,463 @@ def create_dataset(db: Session, fqn: str, source_type: str, columns: List[Dict])
         database_name=database_name,
         schema_name=schema_name,
         table_name=table_name,
-        source_type=source_type
+        source_type=source_type,
+        database_name_lc=database_name.lower(),
+        schema_name_lc=schema_name.lower(),
+        table_name_lc=table_name.lower()
     )
 
     db.add(dataset)
-    db.flush()  # Get the dataset ID
-
-    # Create columns
-    for col in columns:
-        column = DatasetColumn(
-            dataset_id=dataset.id,
-            name=col["name"],
-            type=col["type"]
-        )
-        db.add(column)
-
-    db.commit()
-    db.refresh(dataset)
+    await db.flush()  # Get the dataset ID
+
+    # Create columns with a single multi-row INSERT
+    if columns:
+        await db.execute(insert(DatasetColumn).values([
+            {"dataset_id": dataset.id, "name": col["name"], "type": col["type"],
+             "name_lc": col["name"].lower()}
+            for col in columns
+        ]))
+
+    await db.commit()
+    await db.refresh(dataset, ["columns"])
+    _forget_fqn(fqn)
     log_info(f"Dataset created: {fqn}")
     return dataset
 
 
 @log_exception
-def get_dataset_by_fqn(db: Session, fqn: str) -> Optional[Dataset]:
+async def create_datasets(
+    db: AsyncSession, items: List[Tuple[str, Tuple[str, str, str, str], str, List[Dict]]]
+) -> List[Dataset]:
+    """
+    Create many datasets with their columns using batched multi-row INSERTs
+    items: (fqn, fqn_parts, source_type, columns) tuples
+    """
+    if not items:
+        return []
+
+    dataset_rows = [
+        {
+            "fqn": fqn,
+            "connection_name": parts[0],
+            "database_name": parts[1],
+            "schema_name": parts[2],
+            "table_name": parts[3],
+            "source_type": source_type,
+            "database_name_lc": parts[1].lower(),
+            "schema_name_lc": parts[2].lower(),
+            "table_name_lc": parts[3].lower()
+        }
+        for fqn, parts, source_type, _ in items
+    ]
+    for batch in _batches(dataset_rows):
+        await db.execute(insert(Dataset).values(batch))
+
+    # MySQL has no INSERT ... RETURNING, so read the new ids back by FQN
+    fqns = [item[0] for item in items]
+    ids = {}
+    for batch in _batches(fqns):
+        ids.update((await db.execute(select(Dataset.fqn, Dataset.id).where(Dataset.fqn.in_(batch)))).all())
+
+    column_rows = [
+        {"dataset_id": ids[fqn], "name": col["name"], "type": col["type"],
+         "name_lc": col["name"].lower()}
+        for fqn, _, _, columns in items
+        for col in columns
+    ]
+    for batch in _batches(column_rows):
+        await db.execute(insert(DatasetColumn).values(batch))
+
+    await db.commit()
+    for fqn in fqns:
+        _forget_fqn(fqn)
+
+    by_fqn = {}
+    for batch in _batches(list(ids.values())):
+        for dataset in await db.scalars(
+            select(Dataset).where(Dataset.id.in_(batch)).options(selectinload(Dataset.columns))
+        ):
+            by_fqn[dataset.fqn] = dataset
+    log_info(f"Datasets created: {len(items)}")
+    return [by_fqn[fqn] for fqn in fqns]
+
+
+def _remember_fqn(fqn: str, dataset_id: int):
+    """Store an FQN -> id mapping, evicting the oldest entry when full"""
+    with _fqn_cache_lock:
+        _fqn_cache[fqn] = dataset_id
+        if len(_fqn_cache) > FQN_CACHE_MAX:
+            _fqn_cache.popitem(last=False)
+
+
+def _forget_fqn(fqn: str):
+    """Drop an FQN from the cache"""
+    with _fqn_cache_lock:
+        _fqn_cache.pop(fqn, None)
+
+
+@log_exception
+async def get_dataset_by_fqn(db: AsyncSession, fqn: str) -> Optional[Dataset]:
     """Get dataset by FQN"""
-    return db.query(Dataset).filter(Dataset.fqn == fqn).first()
+    dataset_id = _fqn_cache.get(fqn)
+    if dataset_id is not None:
+        # Primary key lookup, served from the session identity map when possible
+        dataset = await db.get(Dataset, dataset_id)
+        if dataset is not None and dataset.fqn == fqn:
+            return dataset
+        _forget_fqn(fqn)
+
+    dataset = await db.scalar(select(Dataset).where(Dataset.fqn == fqn))
+    if dataset is not None:
+        _remember_fqn(fqn, dataset.id)
+    return dataset
 
 
 @log_exception
-def get_dataset_by_id(db: Session, dataset_id: int) -> Optional[Dataset]:
+async def get_dataset_ids_by_fqns(db: AsyncSession, fqns: List[str]) -> Dict[str, int]:
+    """
+    Get dataset ids for several FQNs in one query; unknown FQNs are left out
+    Results are keyed by the FQNs as requested, not as stored
+    """
+    ids = {}
+    for fqn in fqns:
+        dataset_id = _fqn_cache.get(fqn)
+        if dataset_id is not None:
+            ids[fqn] = dataset_id
+    missing = [fqn for fqn in fqns if fqn not in ids]
+    if missing:
+        found = dict((await db.execute(
+            select(Dataset.fqn, Dataset.id).where(Dataset.fqn.in_(missing))
+        )).all())
+        for fqn in missing:
+            dataset_id = found.get(fqn)
+            if dataset_id is None and found:
+                # The column collation may match an FQN stored with different
+                # case or accents; resolve it the same way a single lookup would
+                dataset = await get_dataset_by_fqn(db, fqn)
+                dataset_id = dataset.id if dataset is not None else None
+            if dataset_id is not None:
+                ids[fqn] = dataset_id
+                _remember_fqn(fqn, dataset_id)
+    return ids
+
+
+@log_exception
+async def get_existing_fqns(db: AsyncSession, fqns: List[str]) -> Set[str]:
+    """Get which of the given FQNs already exist, in one query"""
+    if not fqns:
+        return set()
+    return set((await db.scalars(select(Dataset.fqn).where(Dataset.fqn.in_(fqns)))).all())
+
+
+@log_exception
+async def get_dataset_by_id(db: AsyncSession, dataset_id: int) -> Optional[Dataset]:
     """Get dataset by ID"""
-    return db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    return await db.get(Dataset, dataset_id)
 
 
 @log_exception
-def get_all_datasets(db: Session) -> List[Dataset]:
+async def get_all_datasets(db: AsyncSession) -> List[Dataset]:
     """Get all datasets"""
-    return db.query(Dataset).all()
+    return (await db.scalars(select(Dataset))).all()
 
 
 # CRUD Operations for Lineage
+
+# Lineage writes (cycle check, edge insert, closure update, commit) run one at a
+# time: each closure update reads existing paths, so two edges committed
+# concurrently (X -> Y and Y -> Z) would both miss the path X -> Z. The asyncio
+# lock serializes writers within a worker, the MySQL named lock across workers.
+LINEAGE_LOCK_NAME = "metadata_service_lineage"
+LINEAGE_LOCK_TIMEOUT = 10
+_lineage_lock = asyncio.Lock()
+
+
+@asynccontextmanager
+async def lineage_write_lock(db: AsyncSession) -> AsyncIterator[None]:
+    """Hold the lineage write lock; reads made by db inside it see every committed edge"""
+    async with _lineage_lock:
+        if db.get_bind().dialect.name != "mysql":
+            yield
+            return
+        async with async_engine.connect() as conn:
+            acquired = await conn.scalar(
+                text("SELECT GET_LOCK(:name, :timeout)"),
+                {"name": LINEAGE_LOCK_NAME, "timeout": LINEAGE_LOCK_TIMEOUT}
+            )
+            if acquired != 1:
+                raise RuntimeError(f"Could not acquire lineage lock {LINEAGE_LOCK_NAME}")
+            try:
+                # A transaction begun before the lock would keep reading its old snapshot
+                if db.in_transaction():
+                    await db.commit()
+                yield
+            finally:
+                await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LINEAGE_LOCK_NAME})
+
+
 @log_exception
-def create_lineage(db: Session, upstream_id: int, downstream_id: int) -> Lineage:
-    """Create lineage relationship"""
+async def create_lineage(db: AsyncSession, upstream_id: int, downstream_id: int) -> Lineage:
+    """Create lineage relationship; an existing identical edge is returned as is"""
     lineage = Lineage(upstream_id=upstream_id, downstream_id=downstream_id)
     db.add(lineage)
-    db.commit()
-    db.refresh(lineage)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        existing = await db.scalar(
+            select(Lineage).where(
+                Lineage.upstream_id == upstream_id, Lineage.downstream_id == downstream_id
+            )
+        )
+        if existing is None:
+            raise
+        log_info(f"Lineage already exists: {upstream_id} -> {downstream_id}")
+        return existing
+
+    await _extend_lineage_closure(db, upstream_id, downstream_id)
+    await db.commit()
     log_info(f"Lineage created: {upstream_id} -> {downstream_id}")
     return lineage
 
 
+async def _extend_lineage_closure(db: AsyncSession, upstream_id: int, downstream_id: int):
+    """Add closure rows for every path created by the edge upstream_id -> downstream_id"""
+    ancestors = [upstream_id, *(await db.scalars(
+        select(LineageClosure.ancestor_id).where(LineageClosure.descendant_id == upstream_id)
+    )).all()]
+    descendants = [downstream_id, *(await db.scalars(
+        select(LineageClosure.descendant_id).where(LineageClosure.ancestor_id == downstream_id)
+    )).all()]
+
+    # Paths that already exist through another route (diamonds, or a concurrent
+    # request adding the same path) are skipped by the database
+    rows = [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id}
+        for ancestor_id in ancestors
+        for descendant_id in descendants
+    ]
+    for batch in _batches(rows):
+        await db.execute(_insert_closure_paths().values(batch))
+
+
+def _insert_closure_paths():
+    """Build an INSERT into the closure table that ignores paths already present"""
+    return (
+        insert(LineageClosure)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+
+
+@log_exception
+async def backfill_lineage_closure(db: AsyncSession):
+    """Build the closure table from existing lineage if it has not been built yet"""
+    if await db.scalar(select(LineageClosure.ancestor_id).limit(1)) is not None:
+        return
+    adjacency = await get_lineage_adjacency(db)
+    if not adjacency:
+        return
+
+    # Descendants of each node, computed once per node
+    descendants: Dict[int, Set[int]] = {}
+    for root in list(adjacency):
+        if root in descendants:
+            continue
+        on_path = {root}
+        stack = [(root, iter(adjacency.get(root, [])))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if child not in descendants and child not in on_path:
+                    on_path.add(child)
+                    stack.append((child, iter(adjacency.get(child, []))))
+                    break
+            else:
+                stack.pop()
+                on_path.discard(node)
+                reachable = set()
+                for child in adjacency.get(node, []):
+                    reachable.add(child)
+                    reachable |= descendants.get(child, set())
+                descendants[node] = reachable
+
+    rows = [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id}
+        for ancestor_id, reachable in descendants.items()
+        for descendant_id in reachable
+    ]
+    # Workers starting together may all find the table empty and backfill at once
+    for batch in _batches(rows):
+        await db.execute(_insert_closure_paths().values(batch))
+    await db.commit()
+    log_info(f"Lineage closure backfilled: {len(rows)} paths")
+
+
 @log_exception
-def get_upstream_datasets(db: Session, dataset_id: int) -> List[Dataset]:
+async def get_upstream_datasets(db: AsyncSession, dataset_id: int) -> List[Dataset]:
     """Get all upstream datasets"""
-    lineages = db.query(Lineage).filter(Lineage.downstream_id == dataset_id).all()
-    return [lineage.upstream for lineage in lineages]
+    return (await db.scalars(
+        select(Dataset)
+        .join(Lineage, Lineage.upstream_id == Dataset.id)
+        .where(Lineage.downstream_id == dataset_id)
+        .order_by(Lineage.id)
+    )).all()
 
 
 @log_exception
-def get_downstream_datasets(db: Session, dataset_id: int) -> List[Dataset]:
+async def get_downstream_datasets(db: AsyncSession, dataset_id: int) -> List[Dataset]:
     """Get all downstream datasets"""
-    lineages = db.query(Lineage).filter(Lineage.upstream_id == dataset_id).all()
-    return [lineage.downstream for lineage in lineages]
+    return (await db.scalars(
+        select(Dataset)
+        .join(Lineage, Lineage.downstream_id == Dataset.id)
+        .where(Lineage.upstream_id == dataset_id)
+        .order_by(Lineage.id)
+    )).all()
 
 
 @log_exception
-def get_all_lineages(db: Session) -> List[Lineage]:
+async def get_all_lineages(db: AsyncSession) -> List[Lineage]:
     """Get all lineage relationships"""
-    return db.query(Lineage).all()
+    return (await db.scalars(select(Lineage))).all()
 
 
-# Search Operations
 @log_exception
-def search_datasets(db: Session, query: str) -> List[tuple]:
+async def get_lineage_adjacency(db: AsyncSession) -> Dict[int, List[int]]:
+    """Get the whole lineage graph as an upstream_id -> [downstream_id] map"""
+    adjacency = defaultdict(list)
+    for upstream_id, downstream_id in await db.execute(select(Lineage.upstream_id, Lineage.downstream_id)):
+        adjacency[upstream_id].append(downstream_id)
+    return adjacency
+
+
+@log_exception
+async def prefetch_lineage_fqns(
+    db: AsyncSession, dataset_ids: List[int]
+) -> Tuple[Dict[int, List[str]], Dict[int, List[str]]]:
     """
-    Search datasets by query string
-    Returns list of tuples: (dataset, match_type, priority)
+    Get upstream and downstream FQNs for many datasets in one query
+    Returns two dicts keyed by dataset id: (upstream_fqns, downstream_fqns)
     """
-    query_lower = query.lower()
-    results = []
+    upstream_fqns = defaultdict(list)
+    downstream_fqns = defaultdict(list)
+    if not dataset_ids:
+        return upstream_fqns, downstream_fqns
+
+    upstream = aliased(Dataset)
+    downstream = aliased(Dataset)
+    rows = await db.execute(
+        select(Lineage.upstream_id, Lineage.downstream_id, upstream.fqn, downstream.fqn)
+        .join(upstream, upstream.id == Lineage.upstream_id)
+        .join(downstream, downstream.id == Lineage.downstream_id)
+        .where(Lineage.upstream_id.in_(dataset_ids) | Lineage.downstream_id.in_(dataset_ids))
+        .order_by(Lineage.id)
+    )
+    for upstream_id, downstream_id, upstream_fqn, downstream_fqn in rows:
+        upstream_fqns[downstream_id].append(upstream_fqn)
+        downstream_fqns[upstream_id].append(downstream_fqn)
+    return upstream_fqns, downstream_fqns
 
-    all_datasets = db.query(Dataset).all()
 
-    for dataset in all_datasets:
-        # Check table name match
-        if query_lower in dataset.table_name.lower():
-            results.append((dataset, "table_name", 1))
-            continue
+@log_exception
+async def is_reachable(db: AsyncSession, source_id: int, target_id: int) -> bool:
+    """Check whether target_id is downstream of source_id (closure table lookup)"""
+    stmt = select(literal(1)).where(
+        LineageClosure.ancestor_id == source_id, LineageClosure.descendant_id == target_id
+    )
+    return await db.scalar(stmt) is not None
 
-        # Check column name match
-        column_match = False
-        for col in dataset.columns:
-            if query_lower in col.name.lower():
-                results.append((dataset, "column_name", 2))
-                column_match = True
-                break
-        if column_match:
-            continue
 
-        # Check schema name match
-        if query_lower in dataset.schema_name.lower():
-            results.append((dataset, "schema_name", 3))
-            continue
+# Search Operations
+MATCH_TYPES = {priority: match_type for match_type, priority in SEARCH_PRIORITY.items()}
+LIKE_ESCAPE = "\\"
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so the query is matched literally"""
+    return (
+        value.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+def _use_fulltext(db: AsyncSession, query: str) -> bool:
+    """Check whether the query can be narrowed with the FULLTEXT ngram indexes"""
+    return (
+        db.get_bind().dialect.name == "mysql"
+        and len(query) >= NGRAM_TOKEN_SIZE
+        and query.isalnum()
+    )
 
-        # Check database name match
-        if query_lower in dataset.database_name.lower():
-            results.append((dataset, "database_name", 4))
-            continue
 
-    # Sort by priority
-    results.sort(key=lambda x: x[2])
-    return results
\ No newline at end of file
+def _substring_match(column, query: str, pattern: str, fulltext: bool):
+    """
+    Build the WHERE clause matching query as a substring of column
+    column is one of the *_lc columns; query and pattern are already lower-cased
+    """
+    condition = column.like(pattern, escape=LIKE_ESCAPE)
+    if fulltext:
+        # Phrase search over ngrams finds candidates through the index (built
+        # without stopwords, see _create_schema); LIKE keeps the result exact
+        condition = column.match(f'"{query}"') & condition
+    return condition
+
+
+def _relevance(column, query: str, fulltext: bool):
+    """Build the relevance score of column for query (0 when FULLTEXT is not used)"""
+    if not fulltext:
+        return literal(0.0, Float)
+    return type_coerce(column.match(f'"{query}"'), Float)
+
+
+def _search_statement(query: str, fulltext: bool):
+    """Build the search SELECT for an already lower-cased query"""
+    pattern = f"%{_escape_like(query)}%"
+
+    def tier(id_column, column, match_type):
+        return select(
+            id_column.label("dataset_id"),
+            literal(SEARCH_PRIORITY[match_type]).label("priority"),
+            _relevance(column, query, fulltext).label("relevance")
+        ).where(_substring_match(column, query, pattern, fulltext))
+
+    # One SELECT per match tier, each tagged with its priority
+    tiers = union_all(
+        tier(Dataset.id, Dataset.table_name_lc, "table_name"),
+        tier(DatasetColumn.dataset_id, DatasetColumn.name_lc, "column_name"),
+        tier(Dataset.id, Dataset.schema_name_lc, "schema_name"),
+        tier(Dataset.id, Dataset.database_name_lc, "database_name"),
+    ).subquery()
+
+    # Keep each dataset once, at its best (lowest) priority, ranked by the
+    # relevance of the match in that tier
+    ranked = select(
+        tiers.c.dataset_id,
+        tiers.c.priority,
+        tiers.c.relevance,
+        func.row_number().over(
+            partition_by=tiers.c.dataset_id,
+            order_by=(tiers.c.priority, tiers.c.relevance.desc())
+        ).label("tier_rank")
+    ).subquery()
+
+    return (
+        select(Dataset, ranked.c.priority)
+        .join(ranked, ranked.c.dataset_id == Dataset.id)
+        .where(ranked.c.tier_rank == 1)
+        .options(selectinload(Dataset.columns))
+        .order_by(ranked.c.priority, ranked.c.relevance.desc(), Dataset.id)
+    )
+
+
+@log_exception
+async def search_datasets(db: AsyncSession, query: str) -> List[tuple]:
+    """
+    Search datasets by query string
+    Returns list of tuples: (dataset, match_type, priority)
+    """
+    query = query.lower()
+    stmt = _search_statement(query, _use_fulltext(db, query))
+    rows = (await db.execute(stmt)).all()
+    return [(dataset, MATCH_TYPES[priority], priority) for dataset, priority in rows]
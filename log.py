@@ -1,9 +1,14 @@
 """Logging configuration and utilities"""
 
+import atexit
+import inspect
 import logging
 import os
+import queue
+import reprlib
 from datetime import datetime
 from functools import wraps
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 
@@ -37,17 +42,35 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(console_formatter)
 
+# Records are queued by the caller and written by a background listener thread,
+# so file and console I/O stay off the request path
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+
 # Add handlers
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+logger.addHandler(QueueHandler(log_queue))
+log_listener.start()
+_listener_running = True
+
+
+def stop_logging():
+    """Flush queued records and stop the background log writer"""
+    global _listener_running
+    if _listener_running:
+        _listener_running = False
+        log_listener.stop()
+
+
+atexit.register(stop_logging)
 
 
 def log_error(error_type: str, message: str, details: dict = None):
     """Log error with structured format"""
+    # "message" is a reserved LogRecord attribute, so it is stored as error_message
     error_info = {
         "timestamp": datetime.now().isoformat(),
         "error_type": error_type,
-        "message": message,
+        "error_message": message,
         "details": details or {}
     }
     logger.error(f"{error_type}: {message}", extra=error_info)
@@ -68,25 +91,54 @@ def log_debug(message: str, details: dict = None):
     logger.debug(message, extra={"details": details or {}})
 
 
+# Truncating repr for call arguments attached to error records
+_arg_repr = reprlib.Repr()
+_arg_repr.maxlist = 5
+_arg_repr.maxdict = 5
+_arg_repr.maxstring = 120
+_arg_repr.maxother = 120
+
+# Database sessions carry no useful detail and are expensive to stringify
+_SKIPPED_ARG_TYPES = {"Session", "AsyncSession"}
+
+
+def _log_call_error(func, e: Exception, args: tuple, kwargs: dict):
+    """Log an exception raised by a decorated function"""
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    args = [arg for arg in args if type(arg).__name__ not in _SKIPPED_ARG_TYPES]
+    log_error(
+        error_type=type(e).__name__,
+        message=str(e),
+        details={
+            "function": func.__name__,
+            "args": _arg_repr.repr(args),
+            "kwargs": _arg_repr.repr(kwargs)
+        }
+    )
+
+
 def log_exception(func):
-    """Decorator to log exceptions"""
+    """Decorator to log exceptions (supports sync and async functions)"""
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                _log_call_error(func, e, args, kwargs)
+                raise
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            log_error(
-                error_type=type(e).__name__,
-                message=str(e),
-                details={
-                    "function": func.__name__,
-                    "args": str(args),
-                    "kwargs": str(kwargs)
-                }
-            )
+            _log_call_error(func, e, args, kwargs)
             raise
     return wrapper
 
 
 # Export logger instance
-__all__ = ['logger', 'log_error', 'log_info', 'log_warning', 'log_debug', 'log_exception']
\ No newline at end of file
+__all__ = ['logger', 'log_error', 'log_info', 'log_warning', 'log_debug', 'log_exception', 'stop_logging']
\ No newline at end of file
@@ -2,11 +2,12 @@
 
 import os
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from database import init_db
+from database import init_db, close_db
 from routes import router
-from log import log_info, log_error
+from log import log_info, log_error, stop_logging
 
 # Load environment variables
 load_dotenv()
@@ -17,7 +18,8 @@ app = FastAPI(
     description="A metadata service for data governance - tracks datasets and lineage",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -38,7 +40,7 @@ async def startup_event():
     """Initialize database on startup"""
     try:
         log_info("Starting Metadata Service API...")
-        init_db()
+        await init_db()
         log_info("Database initialized successfully")
         log_info("API is ready to accept requests")
     except Exception as e:
@@ -50,6 +52,8 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     log_info("Shutting down Metadata Service API...")
+    await close_db()
+    stop_logging()
 
 
 if __name__ == "__main__":
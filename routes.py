@@ -1,12 +1,12 @@
 """API Routes - All endpoints"""
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from database import get_db
 from utils import (
     DatasetCreate, DatasetResponse, LineageCreate, LineageResponse,
-    SearchResponse, ErrorResponse, ColumnSchema
+    SearchResponse, ErrorResponse
 )
 from Appmanagement import (
     add_dataset, add_lineage, search_datasets_with_lineage,
@@ -20,7 +20,7 @@ router = APIRouter()
 
 
 @router.post("/datasets", response_model=DatasetResponse)
-def create_dataset(dataset: DatasetCreate, db: Session = Depends(get_db)):
+async def create_dataset(dataset: DatasetCreate, db: AsyncSession = Depends(get_db)):
     """
     Create a new dataset with columns
     
@@ -29,29 +29,22 @@ def create_dataset(dataset: DatasetCreate, db: Session = Depends(get_db)):
     - **columns**: List of columns with name and type
     """
     try:
+        columns = [col.model_dump() for col in dataset.columns]
+
         # Validate data
-        validate_dataset_data(dataset.fqn, dataset.source_type, 
-                            [col.dict() for col in dataset.columns])
+        fqn_parts = validate_dataset_data(dataset.fqn, dataset.source_type, columns)
         
         # Create dataset
-        db_dataset = add_dataset(
+        db_dataset = await add_dataset(
             db,
             fqn=dataset.fqn,
             source_type=dataset.source_type,
-            columns=[col.dict() for col in dataset.columns]
+            columns=columns,
+            fqn_parts=fqn_parts
         )
         
-        # Build response
-        return DatasetResponse(
-            id=db_dataset.id,
-            fqn=db_dataset.fqn,
-            connection_name=db_dataset.connection_name,
-            database_name=db_dataset.database_name,
-            schema_name=db_dataset.schema_name,
-            table_name=db_dataset.table_name,
-            source_type=db_dataset.source_type,
-            columns=[ColumnSchema(name=col.name, type=col.type) for col in db_dataset.columns]
-        )
+        # response_model serializes the ORM object via from_attributes
+        return db_dataset
     
     except DatasetAlreadyExistsError as e:
         log_error("DatasetAlreadyExists", str(e))
@@ -74,7 +67,7 @@ def create_dataset(dataset: DatasetCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/lineage", response_model=LineageResponse)
-def create_lineage(lineage: LineageCreate, db: Session = Depends(get_db)):
+async def create_lineage(lineage: LineageCreate, db: AsyncSession = Depends(get_db)):
     """
     Create lineage relationship between two datasets
     
@@ -84,7 +77,7 @@ def create_lineage(lineage: LineageCreate, db: Session = Depends(get_db)):
     Validates that no cycles are created in the lineage graph
     """
     try:
-        db_lineage = add_lineage(
+        db_lineage = await add_lineage(
             db,
             upstream_fqn=lineage.upstream_fqn,
             downstream_fqn=lineage.downstream_fqn
@@ -117,7 +110,7 @@ def create_lineage(lineage: LineageCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/search", response_model=List[SearchResponse])
-def search_datasets(query: str, db: Session = Depends(get_db)):
+async def search_datasets(query: str, db: AsyncSession = Depends(get_db)):
     """
     Search datasets by name or column names
     
@@ -133,29 +126,9 @@ def search_datasets(query: str, db: Session = Depends(get_db)):
         if not query or len(query.strip()) == 0:
             raise ValueError("Query parameter cannot be empty")
         
-        results = search_datasets_with_lineage(db, query)
-        
-        response = []
-        for result in results:
-            dataset = result["dataset"]
-            response.append(SearchResponse(
-                dataset=DatasetResponse(
-                    id=dataset.id,
-                    fqn=dataset.fqn,
-                    connection_name=dataset.connection_name,
-                    database_name=dataset.database_name,
-                    schema_name=dataset.schema_name,
-                    table_name=dataset.table_name,
-                    source_type=dataset.source_type,
-                    columns=[ColumnSchema(name=col.name, type=col.type) for col in dataset.columns]
-                ),
-                match_type=result["match_type"],
-                priority=result["priority"],
-                upstream_datasets=result["upstream_datasets"],
-                downstream_datasets=result["downstream_datasets"]
-            ))
+        results = await search_datasets_with_lineage(db, query)
         
-        return response
+        return results
     
     except ValueError as e:
         log_error("ValidationError", str(e))
@@ -172,7 +145,7 @@ def search_datasets(query: str, db: Session = Depends(get_db)):
 
 
 @router.get("/datasets/{fqn:path}/lineage",)
-def get_lineage(fqn: str, db: Session = Depends(get_db)):
+async def get_lineage(fqn: str, db: AsyncSession = Depends(get_db)):
     """
     Get lineage information for a specific dataset
     
@@ -181,7 +154,7 @@ def get_lineage(fqn: str, db: Session = Depends(get_db)):
     Returns upstream and downstream datasets
     """
     try:
-        lineage_info = get_dataset_lineage(db, fqn)
+        lineage_info = await get_dataset_lineage(db, fqn)
         
         return {
             "fqn": fqn,
@@ -0,0 +1,51 @@
+"""Shared fixtures: services run against a fresh in-memory SQLite database"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("LOG_FILE", os.path.join(tempfile.gettempdir(), "metadata-service-tests.log"))
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import database
+import Appmanagement
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Point the database module at an in-memory SQLite engine"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    monkeypatch.setattr(database, "async_engine", engine)
+    monkeypatch.setattr(
+        database, "SessionLocal", async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    )
+    # Each test runs its own event loop
+    monkeypatch.setattr(database, "_lineage_lock", asyncio.Lock())
+    database._fqn_cache.clear()
+    Appmanagement.SEARCH_CACHE.clear()
+    return engine
+
+
+@pytest.fixture
+def run(engine):
+    """
+    Run a scenario against an initialized database
+    Usage: run(scenario) where scenario is an async function taking the session
+    """
+    def runner(scenario, init=True):
+        async def main():
+            try:
+                if init:
+                    await database.init_db()
+                async with database.SessionLocal() as db:
+                    return await scenario(db)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return runner
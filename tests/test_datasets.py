@@ -0,0 +1,59 @@
+"""Dataset creation: single and bulk paths"""
+
+import pytest
+
+import database
+from Appmanagement import add_datasets
+
+
+def item(fqn, *columns, source_type="MySQL"):
+    return fqn, source_type, [{"name": name, "type": "INT"} for name in columns]
+
+
+def test_add_datasets_rejects_unknown_source_type(run):
+    async def scenario(db):
+        with pytest.raises(ValueError, match="source_type"):
+            await add_datasets(db, [
+                item("conn.shop.sales.orders", "id"),
+                item("conn.shop.sales.refunds", "id", source_type="Oracle"),
+            ])
+        return await database.get_all_datasets(db)
+
+    assert run(scenario) == []
+
+
+def test_add_datasets_inserts_in_batches(run, monkeypatch):
+    monkeypatch.setattr(database, "INSERT_BATCH_SIZE", 2)
+    fqns = [f"conn.shop.sales.table_{n}" for n in range(5)]
+
+    async def scenario(db):
+        created = await add_datasets(db, [item(fqn, "id", "amount") for fqn in fqns])
+        return [(d.fqn, [c.name for c in d.columns]) for d in created]
+
+    assert run(scenario) == [(fqn, ["id", "amount"]) for fqn in fqns]
+
+
+def test_fqn_cache_serves_lookups_after_first_read(run):
+    fqn = "conn.shop.sales.orders"
+
+    async def scenario(db):
+        created = (await add_datasets(db, [item(fqn, "id")]))[0]
+        assert fqn not in database._fqn_cache
+        found = await database.get_dataset_by_fqn(db, fqn)
+        cached_id = database._fqn_cache.get(fqn)
+        ids = await database.get_dataset_ids_by_fqns(db, [fqn, "conn.shop.sales.missing"])
+        return created.id, found.id, cached_id, ids
+
+    created_id, found_id, cached_id, ids = run(scenario)
+    assert created_id == found_id == cached_id
+    assert ids == {fqn: created_id}
+
+
+def test_column_types_are_not_restricted(run):
+    columns = [{"name": "id", "type": "uuid"}, {"name": "label", "type": "nvarchar(50)"}]
+
+    async def scenario(db):
+        created = await add_datasets(db, [("conn.shop.public.orders", "PostgreSQL", columns)])
+        return [(c.name, c.type) for c in created[0].columns]
+
+    assert run(scenario) == [("id", "uuid"), ("label", "nvarchar(50)")]
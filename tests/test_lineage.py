@@ -0,0 +1,145 @@
+"""Lineage: closure table maintenance and cycle rejection"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select, insert
+
+from Appmanagement import add_dataset, add_lineage, CycleDetectionError
+import database
+from database import (
+    Dataset, Lineage, LineageClosure, backfill_lineage_closure, _extend_lineage_closure
+)
+
+
+async def add_tables(db, *names):
+    for name in names:
+        await add_dataset(db, f"conn.shop.sales.{name}", "MySQL", [{"name": "id", "type": "INT"}])
+
+
+async def link(db, upstream, downstream):
+    return await add_lineage(db, f"conn.shop.sales.{upstream}", f"conn.shop.sales.{downstream}")
+
+
+async def closure(db):
+    """Closure rows as (ancestor table, descendant table) pairs"""
+    names = dict((await db.execute(select(Dataset.id, Dataset.table_name))).all())
+    rows = (await db.execute(select(LineageClosure.ancestor_id, LineageClosure.descendant_id))).all()
+    return sorted((names[ancestor], names[descendant]) for ancestor, descendant in rows)
+
+
+def test_chain_closure(run):
+    async def scenario(db):
+        await add_tables(db, "a", "b", "c")
+        await link(db, "a", "b")
+        await link(db, "b", "c")
+        return await closure(db)
+
+    assert run(scenario) == [("a", "b"), ("a", "c"), ("b", "c")]
+
+
+def test_diamond_closure_has_one_row_per_path(run):
+    async def scenario(db):
+        await add_tables(db, "a", "b", "c", "d")
+        await link(db, "a", "b")
+        await link(db, "a", "c")
+        await link(db, "b", "d")
+        await link(db, "c", "d")
+        return await closure(db)
+
+    assert run(scenario) == [("a", "b"), ("a", "c"), ("a", "d"), ("b", "d"), ("c", "d")]
+
+
+def test_duplicate_edge_returns_existing_lineage(run):
+    async def scenario(db):
+        await add_tables(db, "a", "b")
+        first = await link(db, "a", "b")
+        second = await link(db, "a", "b")
+        edges = await db.scalar(select(func.count()).select_from(Lineage))
+        return first.id, second.id, edges, await closure(db)
+
+    first_id, second_id, edges, paths = run(scenario)
+    assert first_id == second_id
+    assert edges == 1
+    assert paths == [("a", "b")]
+
+
+def test_extending_with_existing_paths_is_ignored(run):
+    async def scenario(db):
+        await add_tables(db, "a", "b")
+        lineage = await link(db, "a", "b")
+        # Same paths written again, as a concurrent request completing them would
+        await _extend_lineage_closure(db, lineage.upstream_id, lineage.downstream_id)
+        await db.commit()
+        return await closure(db)
+
+    assert run(scenario) == [("a", "b")]
+
+
+@pytest.mark.parametrize("upstream, downstream", [("a", "a"), ("b", "a"), ("c", "a")])
+def test_cycles_are_rejected(run, upstream, downstream):
+    async def scenario(db):
+        await add_tables(db, "a", "b", "c")
+        await link(db, "a", "b")
+        await link(db, "b", "c")
+        with pytest.raises(CycleDetectionError):
+            await link(db, upstream, downstream)
+        edges = await db.scalar(select(func.count()).select_from(Lineage))
+        return edges, await closure(db)
+
+    assert run(scenario) == (2, [("a", "b"), ("a", "c"), ("b", "c")])
+
+
+def test_backfill_builds_closure_from_existing_lineage(run):
+    async def scenario(db):
+        await add_tables(db, "a", "b", "c", "d")
+        ids = dict((await db.execute(select(Dataset.table_name, Dataset.id))).all())
+        # Lineage written before the closure table existed
+        await db.execute(insert(Lineage).values([
+            {"upstream_id": ids[up], "downstream_id": ids[down]}
+            for up, down in [("a", "b"), ("b", "c"), ("a", "c"), ("c", "d")]
+        ]))
+        await db.commit()
+        await backfill_lineage_closure(db)
+        return await closure(db)
+
+    assert run(scenario) == [("a", "b"), ("a", "c"), ("a", "d"), ("b", "c"), ("b", "d"), ("c", "d")]
+
+
+def test_concurrent_edges_keep_the_paths_that_join_them(run, monkeypatch):
+    first_in_window = asyncio.Event()
+    second_done = asyncio.Event()
+
+    async def scenario(db):
+        await add_tables(db, "x", "y", "z")
+
+        # Hold the first writer between its closure reads (ancestors, then
+        # descendants) and its closure INSERT, long enough for an unserialized
+        # second writer to run to completion
+        scalars = db.scalars
+        closure_reads = []
+
+        async def scalars_then_wait(stmt, *args, **kwargs):
+            result = await scalars(stmt, *args, **kwargs)
+            if LineageClosure.__table__ in stmt.get_final_froms():
+                closure_reads.append(stmt)
+                if len(closure_reads) == 2:
+                    first_in_window.set()
+                    try:
+                        await asyncio.wait_for(second_done.wait(), 0.5)
+                    except asyncio.TimeoutError:
+                        pass
+            return result
+
+        monkeypatch.setattr(db, "scalars", scalars_then_wait)
+
+        async def second_writer():
+            await first_in_window.wait()
+            async with database.SessionLocal() as other:
+                await link(other, "y", "z")
+            second_done.set()
+
+        await asyncio.gather(link(db, "x", "y"), second_writer())
+        return await closure(db)
+
+    assert run(scenario) == [("x", "y"), ("x", "z"), ("y", "z")]
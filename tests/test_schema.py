@@ -0,0 +1,77 @@
+"""Schema setup: init_db on a fresh database and on one from an older release"""
+
+import asyncio
+
+from sqlalchemy import inspect, text
+
+import database
+from Appmanagement import add_lineage
+from database import search_datasets
+
+# Tables as created before the *_lc search columns and the lineage edge constraint existed
+OLD_SCHEMA = [
+    """CREATE TABLE datasets (
+        id INTEGER PRIMARY KEY, fqn VARCHAR(500) NOT NULL UNIQUE,
+        connection_name VARCHAR(100) NOT NULL, database_name VARCHAR(100) NOT NULL,
+        schema_name VARCHAR(100) NOT NULL, table_name VARCHAR(100) NOT NULL,
+        source_type VARCHAR(50) NOT NULL)""",
+    """CREATE TABLE columns (
+        id INTEGER PRIMARY KEY, dataset_id INTEGER NOT NULL REFERENCES datasets (id),
+        name VARCHAR(100) NOT NULL, type VARCHAR(50) NOT NULL)""",
+    """CREATE TABLE lineage (
+        id INTEGER PRIMARY KEY, upstream_id INTEGER NOT NULL REFERENCES datasets (id),
+        downstream_id INTEGER NOT NULL REFERENCES datasets (id))""",
+    """INSERT INTO datasets VALUES
+        (1, 'conn.Shop.Sales.Orders', 'conn', 'Shop', 'Sales', 'Orders', 'MySQL'),
+        (2, 'conn.Shop.Sales.Order_Totals', 'conn', 'Shop', 'Sales', 'Order_Totals', 'MySQL')""",
+    "INSERT INTO columns VALUES (1, 1, 'Customer_ID', 'int')",
+    # The same edge twice, as repeated POST /lineage calls stored it
+    "INSERT INTO lineage VALUES (1, 1, 2), (2, 1, 2)",
+]
+
+
+def test_init_db_upgrades_existing_tables(engine, run):
+    async def create_old_schema():
+        async with engine.begin() as conn:
+            for statement in OLD_SCHEMA:
+                await conn.execute(text(statement))
+
+    asyncio.run(create_old_schema())
+
+    async def scenario(db):
+        conn = await db.connection()
+        columns = await conn.run_sync(
+            lambda sync_conn: {
+                table: {column["name"] for column in inspect(sync_conn).get_columns(table)}
+                for table in ("datasets", "columns")
+            }
+        )
+        lowered = (await db.execute(text(
+            "SELECT database_name_lc, schema_name_lc, table_name_lc FROM datasets"
+        ))).all()
+        matches = {
+            query: [dataset.fqn for dataset, _, _ in await search_datasets(db, query)]
+            for query in ("orders", "customer_id")
+        }
+        await add_lineage(db, "conn.Shop.Sales.Orders", "conn.Shop.Sales.Order_Totals")
+        edges = (await db.execute(text("SELECT id, upstream_id, downstream_id FROM lineage"))).all()
+        lineage_indexes = await (await db.connection()).run_sync(
+            lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes("lineage")}
+        )
+        return columns, lowered, matches, edges, lineage_indexes
+
+    columns, lowered, matches, edges, lineage_indexes = run(scenario)
+    assert {"database_name_lc", "schema_name_lc", "table_name_lc"} <= columns["datasets"]
+    assert "name_lc" in columns["columns"]
+    assert lowered == [("shop", "sales", "orders"), ("shop", "sales", "order_totals")]
+    assert matches == {"orders": ["conn.Shop.Sales.Orders"], "customer_id": ["conn.Shop.Sales.Orders"]}
+    assert edges == [(1, 1, 2)]
+    assert {"uq_lineage_edge", "ix_lineage_downstream_id"} <= lineage_indexes
+
+
+def test_init_db_is_idempotent(run):
+    async def scenario(db):
+        await database.init_db()
+        return await database.get_all_datasets(db)
+
+    assert run(scenario) == []
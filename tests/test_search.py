@@ -0,0 +1,126 @@
+"""Search behavior: substring matching, tier priority and de-duplication"""
+
+from sqlalchemy import Float, func, type_coerce
+from sqlalchemy.dialects import mysql
+
+import Appmanagement
+import database
+from Appmanagement import add_dataset, search_datasets_with_lineage
+from database import search_datasets, _search_statement
+
+
+async def add(db, fqn, *columns):
+    """Add a dataset whose columns are all INT"""
+    return await add_dataset(db, fqn, "MySQL", [{"name": name, "type": "INT"} for name in columns])
+
+
+def test_search_finds_queries_made_of_stopword_letters(run):
+    async def scenario(db):
+        await add(db, "conn.shop.sales.orders", "id", "total")
+        await add(db, "conn.shop.sales.customer_data", "email")
+        await add(db, "conn.warehouse.raw.events", "payload")
+        return (
+            [dataset.fqn for dataset, _, _ in await search_datasets(db, "id")],
+            [dataset.fqn for dataset, _, _ in await search_datasets(db, "data")],
+        )
+
+    id_matches, data_matches = run(scenario)
+    assert id_matches == ["conn.shop.sales.orders"]
+    assert data_matches == ["conn.shop.sales.customer_data"]
+
+
+def test_fulltext_narrows_each_tier_and_like_keeps_it_exact():
+    sql = str(_search_statement("data", fulltext=True).compile(dialect=mysql.dialect()))
+    for tier in sql.split("UNION ALL"):
+        where = tier.split("WHERE", 1)[1]
+        assert "MATCH" in where and "LIKE" in where
+
+
+def test_ordering_within_a_tier_uses_the_relevance_of_that_tier(run, monkeypatch):
+    # Longer matching values score higher, standing in for MATCH relevance
+    monkeypatch.setattr(
+        database, "_relevance", lambda column, query, fulltext: type_coerce(func.length(column), Float)
+    )
+
+    async def scenario(db):
+        await add(db, "conn.shop.sales.orders", "orders_with_a_very_long_column_name")
+        await add(db, "conn.shop.sales.orders_history", "id")
+        return [d.fqn for d, _, _ in await search_datasets(db, "orders")]
+
+    assert run(scenario) == ["conn.shop.sales.orders_history", "conn.shop.sales.orders"]
+
+
+def test_search_cache_skips_results_read_before_a_write(run, monkeypatch):
+    prefetch = Appmanagement.prefetch_lineage_fqns
+
+    async def prefetch_with_concurrent_write(db, dataset_ids):
+        # Another request commits a new match while this search is in flight
+        await add(db, "conn.shop.sales.orders_archive", "id")
+        return await prefetch(db, dataset_ids)
+
+    async def scenario(db):
+        await add(db, "conn.shop.sales.orders", "id")
+        monkeypatch.setattr(Appmanagement, "prefetch_lineage_fqns", prefetch_with_concurrent_write)
+        stale = await search_datasets_with_lineage(db, "orders")
+        monkeypatch.setattr(Appmanagement, "prefetch_lineage_fqns", prefetch)
+        fresh = await search_datasets_with_lineage(db, "orders")
+        cached = await search_datasets_with_lineage(db, "ORDERS")
+        return stale, fresh, cached
+
+    stale, fresh, cached = run(scenario)
+    assert [r["dataset"]["fqn"] for r in stale] == ["conn.shop.sales.orders"]
+    assert [r["dataset"]["fqn"] for r in fresh] == [
+        "conn.shop.sales.orders", "conn.shop.sales.orders_archive"
+    ]
+    assert cached == fresh
+    assert list(Appmanagement.SEARCH_CACHE) == ["orders"]
+
+
+def test_results_follow_tier_priority(run):
+    async def scenario(db):
+        await add(db, "conn.sales_db.raw.events", "id")
+        await add(db, "conn.shop.sales_raw.events", "id")
+        await add(db, "conn.shop.raw.events", "sales_total")
+        await add(db, "conn.shop.raw.sales", "id")
+        return [(d.fqn, match_type, priority) for d, match_type, priority in await search_datasets(db, "Sales")]
+
+    assert run(scenario) == [
+        ("conn.shop.raw.sales", "table_name", 1),
+        ("conn.shop.raw.events", "column_name", 2),
+        ("conn.shop.sales_raw.events", "schema_name", 3),
+        ("conn.sales_db.raw.events", "database_name", 4),
+    ]
+
+
+def test_dataset_matching_several_tiers_is_listed_once_at_its_best(run):
+    async def scenario(db):
+        await add(db, "conn.orders_db.orders_schema.orders", "order_id", "orders_total")
+        return [(d.fqn, match_type) for d, match_type, _ in await search_datasets(db, "orders")]
+
+    assert run(scenario) == [("conn.orders_db.orders_schema.orders", "table_name")]
+
+
+def test_like_wildcards_match_literally(run):
+    async def scenario(db):
+        await add(db, "conn.shop.sales.order_items", "id")
+        await add(db, "conn.shop.sales.orderitems", "id")
+        return [d.fqn for d, _, _ in await search_datasets(db, "r_i")]
+
+    assert run(scenario) == ["conn.shop.sales.order_items"]
+
+
+def test_cached_search_results_expire(run, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Appmanagement.time, "monotonic", lambda: now[0])
+
+    async def scenario(db):
+        await add(db, "conn.shop.sales.orders", "id")
+        await search_datasets_with_lineage(db, "orders")
+        # A write handled by another worker leaves this worker's cache alone
+        await database.create_dataset(db, "conn.shop.sales.orders_archive", "MySQL", [{"name": "id", "type": "INT"}])
+        cached = await search_datasets_with_lineage(db, "orders")
+        now[0] += Appmanagement.SEARCH_CACHE_TTL
+        expired = await search_datasets_with_lineage(db, "orders")
+        return len(cached), len(expired)
+
+    assert run(scenario) == (1, 2)
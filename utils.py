@@ -1,22 +1,34 @@
 """Pydantic models for input validation and API schemas"""
 
-from typing import List, Optional
-from pydantic import BaseModel, Field, validator
+import re
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from Dbconfig import SOURCE_SYSTEMS
 
+# connection.database.schema.table, all parts non-empty
+_FQN_RE = re.compile(r'^([^.]+)\.([^.]+)\.([^.]+)\.([^.]+)$')
+
+
+def parse_fqn(fqn: str) -> Optional[Tuple[str, str, str, str]]:
+    """Split an FQN into (connection, database, schema, table); None if malformed"""
+    match = _FQN_RE.match(fqn)
+    return match.groups() if match else None
+
 
 class ColumnSchema(BaseModel):
     """Schema for dataset column"""
     name: str = Field(..., description="Column name")
     type: str = Field(..., description="Column data type")
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
             "example": {
                 "name": "order_id",
                 "type": "int"
             }
         }
+    )
 
 
 class DatasetCreate(BaseModel):
@@ -25,21 +37,22 @@ class DatasetCreate(BaseModel):
     source_type: str = Field(..., description="Source system type")
     columns: List[ColumnSchema] = Field(..., description="List of columns")
 
-    @validator('source_type')
+    @field_validator('source_type')
+    @classmethod
     def validate_source_type(cls, v):
         if v not in SOURCE_SYSTEMS:
             raise ValueError(f"source_type must be one of {SOURCE_SYSTEMS}")
         return v
 
-    @validator('fqn')
+    @field_validator('fqn')
+    @classmethod
     def validate_fqn(cls, v):
-        parts = v.split('.')
-        if len(parts) != 4:
+        if parse_fqn(v) is None:
             raise ValueError("FQN must have format: connection.database.schema.table")
         return v
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "fqn": "snowflake_prod.sales.public.orders",
                 "source_type": "PostgreSQL",
@@ -49,6 +62,7 @@ class DatasetCreate(BaseModel):
                 ]
             }
         }
+    )
 
 
 class DatasetResponse(BaseModel):
@@ -62,8 +76,7 @@ class DatasetResponse(BaseModel):
     source_type: str
     columns: List[ColumnSchema]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LineageCreate(BaseModel):
@@ -71,20 +84,21 @@ class LineageCreate(BaseModel):
     upstream_fqn: str = Field(..., description="Upstream dataset FQN")
     downstream_fqn: str = Field(..., description="Downstream dataset FQN")
 
-    @validator('upstream_fqn', 'downstream_fqn')
+    @field_validator('upstream_fqn', 'downstream_fqn')
+    @classmethod
     def validate_fqn(cls, v):
-        parts = v.split('.')
-        if len(parts) != 4:
+        if parse_fqn(v) is None:
             raise ValueError("FQN must have format: connection.database.schema.table")
         return v
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "upstream_fqn": "snowflake.sales.bronze.orders_raw",
                 "downstream_fqn": "snowflake.sales.silver.orders_clean"
             }
         }
+    )
 
 
 class LineageResponse(BaseModel):
@@ -93,8 +107,7 @@ class LineageResponse(BaseModel):
     upstream_fqn: str
     downstream_fqn: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SearchResponse(BaseModel):
@@ -105,8 +118,7 @@ class SearchResponse(BaseModel):
     upstream_datasets: List[str] = []
     downstream_datasets: List[str] = []
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ErrorResponse(BaseModel):
@@ -114,10 +126,11 @@ class ErrorResponse(BaseModel):
     error: str
     details: Optional[str] = None
 
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "error": "Cycle detected",
                 "details": "Creating this lineage would create a cycle: A -> B -> C -> A"
             }
-        }
\ No newline at end of file
+        }
+    )